@@ -113,7 +113,8 @@ def new(name, data=None, compression=None, overwrite=False):
     return mrc
 
 
-def open(name, mode='r', permissive=False):  # @ReservedAssignment
+def open(name, mode='r', permissive=False,  # @ReservedAssignment
+         header_only=False, use_mmap=False):
     """Open an MRC file.
     
     This function opens both normal and compressed MRC files. Supported
@@ -127,6 +128,16 @@ def open(name, mode='r', permissive=False):  # @ReservedAssignment
         mode: The file mode to use. This should be one of the following: 'r' for
             read-only, 'r+' for read and write, or 'w+' for a new empty file.
             The default is 'r'.
+        permissive: Flag to warn about invalid files instead of raising an
+            exception. The default is False.
+        header_only: Flag to read only the header when the file is opened. The
+            extended header and data are read when they are first accessed.
+            This can only be used with mode 'r'. The default is False.
+        use_mmap: Flag to memory-map the data block of an uncompressed file
+            instead of reading it into memory. The data array is then a live
+            view of the file, so it must not be used after the file has been
+            overwritten or truncated (see also :func:`mmap`). This only
+            applies to Python 3 file objects. The default is False.
     
     Returns:
         An :class:`~mrcfile.mrcfile.MrcFile` object (or a
@@ -159,7 +170,8 @@ def open(name, mode='r', permissive=False):  # @ReservedAssignment
                 NewMrc = GzipMrcFile
             elif start[:2] == b'BZ':
                 NewMrc = Bzip2MrcFile
-    return NewMrc(name, mode=mode, permissive=permissive)
+    return NewMrc(name, mode=mode, permissive=permissive,
+                  header_only=header_only, use_mmap=use_mmap)
 
 
 def mmap(name, mode='r', permissive=False):
@@ -62,8 +62,9 @@ class Bzip2MrcFile(MrcFile):
             self._iostream.close()
             self._iostream = bz2.BZ2File(self._fname, mode='w')
             
-            # Arrays converted to bytes so gzip can calculate sizes correctly
+            # Arrays converted to bytes so gzip can calculate sizes correctly.
+            # The data is written in byte chunks to avoid copying it all.
             self._iostream.write(self.header.tobytes())
             self._iostream.write(self.extended_header.tobytes())
-            self._iostream.write(self.data.tobytes())
+            self._write_data()
             # no equivalent for flush() with BZ2File
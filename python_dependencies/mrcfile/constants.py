@@ -17,6 +17,7 @@ MRC_FORMAT_VERSION = 20140  # MRC2014 format, version 0
 
 MAP_ID = b'MAP '
 MAP_ID_OFFSET_BYTES = 208  # location of 'MAP ' string in an MRC file
+MACHST_OFFSET_BYTES = 212  # location of machine stamp in an MRC file
 
 IMAGE_STACK_SPACEGROUP = 0
 VOLUME_SPACEGROUP = 1
@@ -69,9 +69,10 @@ class GzipMrcFile(MrcFile):
             self._fileobj.seek(0)
             self._iostream = gzip.GzipFile(fileobj=self._fileobj, mode='wb')
             
-            # Arrays converted to bytes so gzip can calculate sizes correctly
+            # Arrays converted to bytes so gzip can calculate sizes correctly.
+            # The data is written in byte chunks to avoid copying it all.
             self._iostream.write(self.header.tobytes())
             self._iostream.write(self.extended_header.tobytes())
-            self._iostream.write(self.data.tobytes())
+            self._write_data()
             self._iostream.flush()
             self._fileobj.truncate()
@@ -107,12 +107,28 @@ class MrcFile(MrcInterpreter):
         self._iostream.seek(0)
         super(MrcFile, self)._read()
         
-        # Check if the file is the expected size.
-        if self.data is not None:
+        # If the data block has been deferred, the size is checked once it is
+        # read instead
+        if not self._header_only:
+            self._check_file_size()
+    
+    def _read_deferred(self):
+        """Override _read_deferred() to check the file size after reading."""
+        if self._deferred_offset is not None:
+            super(MrcFile, self)._read_deferred()
+            self._check_file_size()
+    
+    def _check_file_size(self):
+        """Warn if the file is larger than expected from the header.
+        
+        Warns:
+            RuntimeWarning: If the file is larger than expected.
+        """
+        if self._data is not None:
             actual_size = self._get_file_size()
             expected_size = (self.header.nbytes
-                             + self.extended_header.nbytes
-                             + self.data.nbytes)
+                             + self._extended_header.nbytes
+                             + self._data.nbytes)
             
             if actual_size > expected_size:
                 msg = ("MRC file is {0} bytes larger than expected"
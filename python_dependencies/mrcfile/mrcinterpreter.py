@@ -16,6 +16,8 @@ Classes:
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import io
+import os
 import warnings
 
 import numpy as np
@@ -23,7 +25,16 @@ import numpy as np
 from . import utils
 from .dtypes import HEADER_DTYPE
 from .mrcobject import MrcObject
-from .constants import MAP_ID
+
+
+# Approximate size of each write() call when writing the data block
+WRITE_CHUNK_NBYTES = 16 * 1024 * 1024
+
+# ResourceWarning does not exist in Python 2, so fall back to RuntimeWarning
+try:
+    ResourceWarning
+except NameError:
+    ResourceWarning = RuntimeWarning  # @ReservedAssignment
 
 
 class MrcInterpreter(MrcObject):
@@ -53,7 +64,8 @@ class MrcInterpreter(MrcObject):
     
     """
     
-    def __init__(self, iostream=None, permissive=False, **kwargs):
+    def __init__(self, iostream=None, permissive=False, use_mmap=False,
+                 header_only=False, **kwargs):
         """Initialise a new MrcInterpreter object.
         
         This initialiser reads the stream if it is given. In general, subclasses
@@ -68,11 +80,27 @@ class MrcInterpreter(MrcObject):
         Args:
             iostream: The I/O stream to use to read and write MRC data. The
                 default is None.
+            permissive: Flag to warn about invalid files instead of raising
+                an exception. The default is False.
+            use_mmap: Flag to memory-map the data block if the stream is a
+                plain file, rather than reading it into memory. The data array
+                is then a live view of the file, so it must not be used after
+                the file has been overwritten or truncated. This only applies
+                to Python 3 file objects. The default is False.
+            header_only: Flag to read only the header at first, and defer
+                reading the extended header and data until they are accessed.
+                This is only allowed if the object is read-only. The default is
+                False.
         """
         super(MrcInterpreter, self).__init__(**kwargs)
         
         self._iostream = iostream
         self._permissive = permissive
+        self._use_mmap = use_mmap
+        self._header_only = header_only
+        self._deferred_offset = None
+        self._nsymbt = 0
+        self._data_layout = None
         
         # If iostream is given, initialise by reading it
         if self._iostream is not None:
@@ -94,15 +122,27 @@ class MrcInterpreter(MrcObject):
         self.close()
     
     def __del__(self):
-        """Attempt to flush the stream when this object is garbage collected.
+        """Release the header and data arrays when this object is garbage
+        collected.
         
-        It's better not to rely on this - instead, use a 'with' block or
-        explicitly call the close() method.
+        The stream is not flushed here, so any unsaved changes are lost. Use a
+        'with' block or explicitly call the close() method instead.
+        
+        Warns:
+            ResourceWarning: If the object is writeable and was not closed
+                (RuntimeWarning on Python 2).
         """
-        try:
-            self.close()
-        except Exception:
-            pass
+        iostream = getattr(self, '_iostream', None)
+        if (getattr(self, '_header', None) is not None
+            and not self._read_only
+            and iostream is not None
+            and not getattr(iostream, 'closed', False)):
+            warnings.warn("Writeable MRC object was not closed - changes may "
+                          "not have been saved. Use a 'with' block or call "
+                          "close() to avoid this.", ResourceWarning)
+        self._header = None
+        self._extended_header = None
+        self._data = None
     
     def _read(self):
         """Read the header, extended header and data from the I/O stream.
@@ -111,12 +151,65 @@ class MrcInterpreter(MrcObject):
         the start of the header. This method will advance the stream to the end
         of the data block.
         
+        If header_only was set, only the header is read and the stream is left
+        at the end of the header. The extended header and data are then read
+        when they are first accessed.
+        
         Raises:
-            ValueError: If the file is not a valid MRC file.
+            ValueError: If the file is not a valid MRC file, or header_only was
+                set for an object which is not read-only.
         """
+        if self._header_only and not self._read_only:
+            raise ValueError("header_only can only be used in read-only mode")
+        
         self._read_header()
-        self._read_extended_header()
-        self._read_data()
+        if self._header_only:
+            self._deferred_offset = self._iostream.tell()
+        else:
+            self._read_extended_header()
+            self._read_data()
+    
+    def _read_deferred(self):
+        """Read the extended header and data, if they have been deferred.
+        
+        The deferred state is only cleared once both have been read, so if
+        reading fails the error is raised again on the next access rather than
+        the data silently appearing to be None.
+        """
+        if self._deferred_offset is not None:
+            self._iostream.seek(self._deferred_offset)
+            self._read_extended_header()
+            self._read_data()
+            self._deferred_offset = None
+    
+    @property
+    def extended_header(self):
+        """Get the extended header as a numpy array.
+        
+        By default the dtype of the extended header array is void (raw data,
+        dtype 'V'). If the actual data type of the extended header is known, the
+        dtype of the array can be changed to match.
+        
+        The extended header may be modified in place. To replace it completely,
+        call set_extended_header().
+        
+        If reading was deferred by header_only, the extended header and data
+        are read from the stream the first time this is accessed.
+        """
+        self._read_deferred()
+        return self._extended_header
+    
+    @property
+    def data(self):
+        """Get the data as a numpy array.
+        
+        To replace the data array completely, call set_data().
+        
+        If reading was deferred by header_only, the extended header and data
+        are read from the stream the first time this is accessed.
+        """
+        self._read_deferred()
+        return self._data
 
     def _read_header(self):
         """Read the MRC header from the I/O stream.
@@ -125,62 +218,69 @@ class MrcInterpreter(MrcObject):
         will be advanced by 1024 bytes.
         
         Raises:
-            ValueError: If the file is not a valid MRC file.
+            ValueError: If the file is not a valid MRC file, or (unless
+                permissive is True) the header's mode or extended header size
+                is invalid.
         """
-        # Read 1024 bytes from the stream
-        header_str = self._iostream.read(HEADER_DTYPE.itemsize)
-        
-        if len(header_str) < HEADER_DTYPE.itemsize:
-            raise ValueError("Couldn't read enough bytes for MRC header")
-        
-        # Use a recarray to allow access to fields as attributes
-        # (e.g. header.mode instead of header['mode'])
-        header = np.rec.fromstring(header_str, dtype=HEADER_DTYPE, shape=())
+        # Read 1024 bytes from the stream into a mutable buffer, which the
+        # header array can then use directly
+        header_buf = self._read_bytearray(HEADER_DTYPE.itemsize)
+        header = utils.parse_header(header_buf, self._permissive)
         
-        # Make header writeable, because fromstring() creates a read-only array
-        header.flags.writeable = True
+        header.flags.writeable = not self._read_only
+        self._header = header
         
-        # Check this is an MRC file, and read machine stamp to get byte order
-        if header.map != MAP_ID:
-            msg = "Map ID string not found - not an MRC file, or file is corrupt"
+        # Cache the stream layout while the header is known to match it, so
+        # the rest of the read (which might be deferred) doesn't need to look
+        # up header fields again. In permissive mode an invalid header is left
+        # for _read_data() to warn about; otherwise the error is raised now.
+        # (A negative extended header size is recorded as None, meaning that
+        # the position of the data block is unknown.)
+        self._nsymbt = int(header.nsymbt)
+        if self._nsymbt < 0:
+            msg = "Invalid extended header size: {0} bytes".format(self._nsymbt)
             if self._permissive:
-                warnings.warn(msg, RuntimeWarning)
+                warnings.warn("{0} - extended header cannot be read"
+                              .format(msg), RuntimeWarning)
+                self._nsymbt = None
             else:
                 raise ValueError(msg)
         
-        try:
-            byte_order = utils.byte_order_from_machine_stamp(header.machst)
-        except ValueError as err:
-            if self._permissive:
-                byte_order = '<' # try little-endian as a sensible default
-                warnings.warn(str(err), RuntimeWarning)
-            else:
-                raise
-        
-        # Create a new dtype with the correct byte order and update the header
-        header.dtype = header.dtype.newbyteorder(byte_order)
-        
-        header.flags.writeable = not self._read_only
-        self._header = header
+        if self._permissive:
+            try:
+                self._data_layout = self._data_layout_from_header()
+            except ValueError:
+                self._data_layout = None
+        else:
+            self._data_layout = self._data_layout_from_header()
     
     def _read_extended_header(self):
         """Read the extended header from the stream.
         
-        If there is no extended header, a zero-length array is assigned to the
-        extended_header attribute.
+        If there is no extended header, or its size in the header was invalid,
+        a zero-length array is assigned to the extended_header attribute
+        without making a read() call on the stream.
         """
-        ext_header_str = self._iostream.read(int(self.header.nsymbt))
-        self._extended_header = np.fromstring(ext_header_str, dtype='V1')
-        self._extended_header.flags.writeable = not self._read_only
+        if not self._nsymbt:
+            ext_header_buf = bytearray()
+        else:
+            ext_header_buf = self._read_bytearray(self._nsymbt)
+        ext_header = np.frombuffer(ext_header_buf, dtype='V1')
+        ext_header.flags.writeable = not self._read_only
+        self._extended_header = ext_header
     
     def _read_data(self):
         """Read the data array from the stream.
         
         This method uses information from the header to set the data array's
         shape and dtype.
+        
+        If use_mmap was set and the stream is a plain file, the data block is
+        opened as a numpy memmap array instead of being read into memory, so
+        pages are only loaded from disk when they are accessed.
         """
         try:
-            dtype = utils.data_dtype_from_header(self.header)
+            dtype, shape, nbytes = self._get_data_layout()
         except ValueError as err:
             if self._permissive:
                 warnings.warn("{0} - data block cannot be read".format(err),
@@ -190,17 +290,23 @@ class MrcInterpreter(MrcObject):
             else:
                 raise
         
-        shape = utils.data_shape_from_header(self.header)
-        
-        nbytes = dtype.itemsize
-        for axis_length in shape:
-            nbytes *= axis_length
+        use_mmap = nbytes > 0 and self._use_mmap and self._iostream_is_file()
+        use_readinto = hasattr(self._iostream, 'readinto')
+        if use_mmap:
+            offset = self._iostream.tell()
+            file_size = os.fstat(self._iostream.fileno()).st_size
+            nbytes_read = min(nbytes, max(file_size - offset, 0))
+        elif use_readinto:
+            # Read straight into the new array, with no intermediate bytes
+            data = np.empty(shape, dtype=dtype)
+            nbytes_read = self._readinto(data.reshape(-1).view(np.uint8))
+        else:
+            data_bytes = self._iostream.read(nbytes)
+            nbytes_read = len(data_bytes)
         
-        data_bytes = self._iostream.read(nbytes)
-        
-        if len(data_bytes) < nbytes:
+        if nbytes_read < nbytes:
             msg = ("Expected {0} bytes in data block but could only read {1}"
-                   .format(nbytes, len(data_bytes)))
+                   .format(nbytes, nbytes_read))
             if self._permissive:
                 warnings.warn(msg, RuntimeWarning)
                 self._data = None
@@ -208,13 +314,130 @@ class MrcInterpreter(MrcObject):
             else:
                 raise ValueError(msg)
         
-        self._data = np.frombuffer(data_bytes, dtype=dtype).reshape(shape)
-        self._data.flags.writeable = not self._read_only
+        if use_mmap:
+            self._open_memmap(dtype, shape, offset)
+            
+            # Leave the stream at the end of the data block, as for read()
+            self._iostream.seek(offset + nbytes)
+        elif use_readinto:
+            data.flags.writeable = not self._read_only
+            self._data = data
+        else:
+            data = np.frombuffer(data_bytes, dtype=dtype).reshape(shape)
+            
+            # frombuffer() gives a read-only view of the bytes, so only copy it
+            # if the data needs to be writeable
+            if not self._read_only:
+                data = data.copy()
+            self._data = data
+    
+    def _read_bytearray(self, nbytes):
+        """Read up to nbytes from the stream into a new bytearray.
+        
+        Unlike the bytes returned by read(), a bytearray is mutable, so numpy
+        arrays created from it with frombuffer() are writeable without a copy.
+        """
+        if not hasattr(self._iostream, 'readinto'):
+            return bytearray(self._iostream.read(nbytes))
+        buf = bytearray(nbytes)
+        nbytes_read = self._readinto(buf)
+        if nbytes_read < nbytes:
+            return buf[:nbytes_read]
+        return buf
+    
+    def _readinto(self, buf):
+        """Read from the stream into the given buffer until it is full.
+        
+        Returns:
+            The number of bytes read, which is less than the size of the buffer
+            only if the end of the stream was reached.
+        """
+        view = memoryview(buf)
+        nbytes_read = 0
+        while nbytes_read < len(view):
+            count = self._iostream.readinto(view[nbytes_read:])
+            if not count:
+                break
+            nbytes_read += count
+        return nbytes_read
+    
+    def _get_data_layout(self):
+        """Get the dtype, shape and size in bytes of the data block.
+        
+        The layout cached when the header was read is used if possible,
+        otherwise it is calculated from the current header.
+        
+        Raises:
+            ValueError: If the header's mode is not a valid MRC mode, or the
+                extended header size was invalid so the data block cannot be
+                found.
+        """
+        if self._nsymbt is None:
+            raise ValueError("Invalid extended header size")
+        if self._data_layout is not None:
+            return self._data_layout
+        return self._data_layout_from_header()
+    
+    def _data_layout_from_header(self):
+        """Calculate the dtype, shape and size in bytes of the data block."""
+        dtype = utils.data_dtype_from_header(self.header)
+        shape = utils.data_shape_from_header(self.header)
+        nbytes = int(np.multiply.reduce(shape, dtype=np.int64)) * dtype.itemsize
+        return dtype, shape, nbytes
+    
+    def _iostream_is_file(self):
+        """Return True if the I/O stream is a plain file which can be mapped.
+        
+        The stream (or the raw stream underneath a buffered one) must be a
+        file object, so compressed streams are excluded even though they
+        expose the underlying file's descriptor, and it must be seekable and
+        have a real file descriptor (so pipes, for example, are excluded).
+        """
+        raw = getattr(self._iostream, 'raw', self._iostream)
+        if not isinstance(raw, io.FileIO):
+            return False
+        try:
+            if not self._iostream.seekable():
+                return False
+            os.fstat(self._iostream.fileno())
+        except (AttributeError, io.UnsupportedOperation, OSError):
+            return False
+        return True
+    
+    def _open_memmap(self, dtype, shape, offset=None):
+        """Open a new memmap array pointing at the stream's data block.
+        
+        If offset is not given, the data block is assumed to start straight
+        after the extended header, as given by the header's nsymbt field.
+        """
+        if offset is None:
+            offset = self.header.nbytes + self.header.nsymbt
+        acc_mode = 'r' if self._read_only else 'r+'
+        
+        self._iostream.flush()
+        self._data = np.memmap(self._iostream,
+                               dtype=dtype,
+                               mode=acc_mode,
+                               offset=offset,
+                               shape=shape)
+    
+    def _close_data(self):
+        """Close the data array, flushing it first if it is a memmap.
+        
+        A memmap array is flagged as read-only before it is released, so if a
+        reference to it has been kept elsewhere, changes to it should no longer
+        be able to change the file contents.
+        """
+        if isinstance(self._data, np.memmap):
+            self._data.flush()
+            self._data.flags.writeable = False
+        super(MrcInterpreter, self)._close_data()
     
     def close(self):
         """Flush to the stream and clear the header and data attributes."""
         if self._header is not None and not self._iostream.closed:
             self.flush()
+        self._deferred_offset = None
         self._header = None
         self._extended_header = None
         self._close_data()
@@ -225,13 +448,55 @@ class MrcInterpreter(MrcObject):
         This implementation seeks to the start of the stream, writes the header,
         extended header and data arrays, and then truncates the stream.
         
+        If the data is a memmap array pointing at the stream's data block, the
+        memmap is flushed instead of the data being written out again.
+        
         Subclasses should override this implementation for streams which do not
         support seek() or truncate().
         """
         if not self._read_only:
+            data_offset = self.header.nbytes + self.extended_header.nbytes
+            if (isinstance(self._data, np.memmap)
+                and self._data.offset != data_offset):
+                # The data block is moving because the extended header has
+                # changed size, so read it into memory before it is overwritten
+                data = np.array(self._data)
+                self._close_data()
+                self._set_new_data(data)
+            
             self._iostream.seek(0)
             self._iostream.write(self.header)
             self._iostream.write(self.extended_header)
-            self._iostream.write(np.ascontiguousarray(self.data))
+            if isinstance(self._data, np.memmap):
+                # Flushing the file before the mmap makes the mmap flush faster
+                self._iostream.flush()
+                self._data.flush()
+                self._iostream.seek(self._data.nbytes, os.SEEK_CUR)
+            else:
+                self._write_data()
             self._iostream.truncate()
             self._iostream.flush()
+    
+    def _write_data(self):
+        """Write the data array to the I/O stream in chunks.
+        
+        The data is written in chunks of whole sections (along the slowest
+        axis) of about 16 MiB. Contiguous data is written straight from the
+        array's buffer; otherwise each chunk is copied to make it contiguous,
+        so the extra memory needed is bounded by the chunk size.
+        """
+        data = self.data
+        if data.size == 0:
+            return
+        section_nbytes = data.nbytes // data.shape[0]
+        sections_per_chunk = max(1, WRITE_CHUNK_NBYTES // section_nbytes)
+        if data.flags.c_contiguous:
+            buf = memoryview(data.reshape(-1).view(np.uint8))
+            chunk_nbytes = sections_per_chunk * section_nbytes
+            for start in range(0, data.nbytes, chunk_nbytes):
+                self._iostream.write(buf[start:start + chunk_nbytes])
+        else:
+            for start in range(0, data.shape[0], sections_per_chunk):
+                stop = start + sections_per_chunk
+                chunk = np.ascontiguousarray(data[start:stop])
+                self._iostream.write(chunk.reshape(-1).view(np.uint8))
@@ -16,12 +16,10 @@ Classes:
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-import os
 import warnings
 
 import numpy as np
 
-import mrcfile.utils as utils
 from .mrcfile import MrcFile
 
 
@@ -72,22 +70,6 @@ class MrcMemmap(MrcFile):
         else:
             self._extended_header = extended_header
     
-    def flush(self):
-        """Flush the header and data arrays to the file buffer."""
-        if not self._read_only:
-            self._iostream.seek(0)
-            self._iostream.write(self.header)
-            self._iostream.write(self.extended_header)
-            
-            # Flushing the file before the mmap makes the mmap flush faster
-            self._iostream.flush()
-            self._data.flush()
-            self._iostream.flush()
-            
-            # Seek to end of data block so stream is left in the same position
-            # as normal
-            self._iostream.seek(self._data.nbytes, os.SEEK_CUR)
-    
     def _read_data(self):
         """Read the data block from the file.
         
@@ -96,7 +78,7 @@ class MrcMemmap(MrcFile):
         opens the data as a numpy memmap array.
         """
         try:
-            dtype = utils.data_dtype_from_header(self.header)
+            dtype, shape, _ = self._get_data_layout()
         except ValueError as err:
             if self._permissive:
                 warnings.warn("{0} - data block not read".format(err),
@@ -106,34 +88,8 @@ class MrcMemmap(MrcFile):
             else:
                 raise
         
-        shape = utils.data_shape_from_header(self.header)
-        
         self._open_memmap(dtype, shape)
     
-    def _open_memmap(self, dtype, shape):
-        """Open a new memmap array pointing at the file's data block."""
-        acc_mode = 'r' if self._read_only else 'r+'
-        header_nbytes = self.header.nbytes + self.header.nsymbt
-        
-        self._iostream.flush()
-        self._data = np.memmap(self._iostream,
-                               dtype=dtype,
-                               mode=acc_mode,
-                               offset=header_nbytes,
-                               shape=shape)
-    
-    def _close_data(self):
-        """Delete the existing memmap array, if it exists.
-        
-        The array is flagged as read-only before deletion, so if a reference to
-        it has been kept elsewhere, changes to it should no longer be able to
-        change the file contents.
-        """
-        if self._data is not None:
-            self._data.flush()
-            self._data.flags.writeable = False
-            self._data = None
-    
     def _set_new_data(self, data):
         """Override of _set_new_data() to handle opening a new memmap and
         copying data into it."""
@@ -65,6 +65,7 @@ class MrcObject(object):
     
     Methods:
     
+    * :meth:`extended_header_as`
     * :meth:`set_extended_header`
     * :meth:`set_data`
     * :meth:`is_single_image`
@@ -122,8 +123,8 @@ class MrcObject(object):
     def _create_default_attributes(self):
         """Set valid default values for the header and data attributes."""
         self._create_default_header()
-        self._extended_header = np.fromstring('', dtype='V1')
-        self._set_new_data(np.fromstring('', dtype=np.int8))
+        self._extended_header = np.frombuffer(b'', dtype='V1').copy()
+        self._set_new_data(np.frombuffer(b'', dtype=np.int8).copy())
     
     def _create_default_header(self):
         """Create a default MRC file header.
@@ -184,6 +185,26 @@ class MrcObject(object):
         """
         return self._extended_header
     
+    def extended_header_as(self, dtype):
+        """Get a view of the extended header with the given dtype.
+        
+        This is useful for extended headers with a known structure (for
+        example, FEI or SerialEM extended headers). The returned array shares
+        memory with the extended header, so no data is copied, and it is only
+        writeable if the extended header is.
+        
+        Args:
+            dtype: The numpy dtype to view the extended header as.
+        
+        Returns:
+            A one-dimensional numpy array with the given dtype.
+        
+        Raises:
+            ValueError: If the size of the extended header is not a multiple of
+                the dtype's item size.
+        """
+        return self.extended_header.view(dtype)
+    
     def set_extended_header(self, extended_header):
         """Replace the extended header.
         
@@ -10,6 +10,7 @@ Utility functions used by the other modules in the mrcfile package.
 Functions
 ---------
 
+* :func:`parse_header`: Create an MRC header record array from raw bytes.
 * :func:`data_dtype_from_header`: Work out the data dtype from an MRC header
 * :func:`data_shape_from_header`: Work out the data array shape from an MRC
       header
@@ -30,18 +31,92 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 import sys
+import warnings
 
 import numpy as np
 
-from .constants import IMAGE_STACK_SPACEGROUP
+from .constants import (IMAGE_STACK_SPACEGROUP, MAP_ID, MAP_ID_OFFSET_BYTES,
+                        MACHST_OFFSET_BYTES)
+from .dtypes import HEADER_DTYPE
+
+
+_machine_stamp_to_byte_order = {b'\x44\x44\x00\x00': '<',
+                                b'\x44\x41\x00\x00': '<',
+                                b'\x11\x11\x00\x00': '>'}
+
+def parse_header(header_bytes, permissive=False):
+    """Create an MRC header from the given raw bytes.
+    
+    The map ID string and machine stamp are checked directly in the raw bytes,
+    before the header array is created, and the header's dtype is then given
+    the byte order indicated by the machine stamp.
+    
+    Args:
+        header_bytes: The header, as a bytes-like object of (at least) 1024
+            bytes. If the object is mutable (e.g. a bytearray), the header
+            array shares its memory.
+        permissive: Flag to warn about an invalid map ID or machine stamp
+            instead of raising an exception. The default is False.
+    
+    Returns:
+        The header, as a writeable numpy record array.
+    
+    Raises:
+        ValueError: If there are too few bytes for a header, or (unless
+            permissive is True) the map ID or machine stamp is invalid.
+    
+    Warns:
+        RuntimeWarning: If permissive is True and the map ID or machine stamp
+            is invalid.
+    """
+    if len(header_bytes) < HEADER_DTYPE.itemsize:
+        raise ValueError("Couldn't read enough bytes for MRC header")
+    
+    # Check this is an MRC file, and read machine stamp to get byte order
+    map_id = header_bytes[MAP_ID_OFFSET_BYTES:MAP_ID_OFFSET_BYTES + len(MAP_ID)]
+    if map_id != MAP_ID:
+        msg = "Map ID string not found - not an MRC file, or file is corrupt"
+        if permissive:
+            warnings.warn(msg, RuntimeWarning)
+        else:
+            raise ValueError(msg)
+    
+    # Look up the standard machine stamps directly, and only fall back to the
+    # full check for unusual ones
+    machst = bytes(header_bytes[MACHST_OFFSET_BYTES:MACHST_OFFSET_BYTES + 4])
+    byte_order = _machine_stamp_to_byte_order.get(machst)
+    if byte_order is None:
+        try:
+            byte_order = byte_order_from_machine_stamp(bytearray(machst))
+        except ValueError as err:
+            if permissive:
+                byte_order = '<' # try little-endian as a sensible default
+                warnings.warn(str(err), RuntimeWarning)
+            else:
+                raise
+    
+    # Use a recarray to allow access to fields as attributes
+    # (e.g. header.mode instead of header['mode']). frombuffer() wraps the
+    # buffer without copying, so a copy is only needed if the buffer is
+    # read-only (e.g. bytes rather than a bytearray).
+    header = (np.frombuffer(header_bytes, dtype=HEADER_DTYPE, count=1)
+              .reshape(()).view(np.recarray))
+    if not header.flags.writeable:
+        header = header.copy()
+    
+    # HEADER_DTYPE is already native, so only swap for non-native files
+    if not byte_orders_equal(byte_order, '='):
+        header.dtype = header.dtype.newbyteorder(byte_order)
+    return header
 
 
 def data_dtype_from_header(header):
     """Return the data dtype indicated by the given header.
     
-    This method calls dtype_from_mode() to get the basic dtype, and then makes
-    sure that the byte order of the new dtype matches the byte order of the
-    header's mode field.
+    This method looks up the dtype for the header's mode in a table of
+    prebuilt dtypes, which already have the byte order of the header's mode
+    field. If the mode is not in the table, dtype_from_mode() is called to
+    raise the appropriate error.
     
     Args:
         header: An MRC header as a numpy record array.
@@ -54,7 +129,11 @@ def data_dtype_from_header(header):
         ValueError: If there is no corresponding dtype for the given mode.
     """
     mode = header.mode
-    return dtype_from_mode(mode).newbyteorder(mode.dtype.byteorder)
+    byte_order = mode.dtype.byteorder
+    try:
+        return _mode_and_byte_order_to_dtype[(int(mode), byte_order)]
+    except KeyError:
+        return dtype_from_mode(mode).newbyteorder(byte_order)
 
 
 def data_shape_from_header(header):
@@ -155,6 +234,15 @@ def dtype_from_mode(mode):
         raise ValueError("Unrecognised mode '{0}'".format(mode))
 
 
+# Data dtypes for each mode and byte order, built once so they do not need to
+# be recreated every time a file is read
+_mode_and_byte_order_to_dtype = dict(
+    ((mode, byte_order), np.dtype(dtype).newbyteorder(byte_order))
+    for mode, dtype in _mode_to_dtype.items()
+    for byte_order in ('=', '<', '>')
+)
+
+
 def byte_order_from_machine_stamp(machst):
     """Return the byte order corresponding to the given machine stamp.
     